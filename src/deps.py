@@ -1,56 +1,204 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from jose.exceptions import JWKError
+import jwt
+from jwt import PyJWK, PyJWKError, PyJWTError
+import asyncio
+import hashlib
+import hmac
 import httpx
 import os
 import time
-from typing import Dict, Any, Tuple
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
-# JWKS cache: {kid: (key_dict, fetched_timestamp)}
-_jwks_cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
-_JWKS_CACHE_TTL = 21600  # Cache keys for 6 hours
-
-async def get_public_key(kid: str, supabase_url: str) -> Dict[str, Any]:
-    """Fetch the public key from Supabase JWKS endpoint (cached)."""
-    if kid in _jwks_cache:
-        cached_key, cached_at = _jwks_cache[kid]
-        if time.time() - cached_at < _JWKS_CACHE_TTL:
-            return cached_key
-
+# Read once at import (main.py loads .env before importing this module)
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN", "super-secret-debug-token").encode()
+_DEBUG_USER: Dict[str, Any] = {"sub": "debug-user", "email": "you@localhost"}
+
+# JWKS cache: {(supabase_url, kid): (public_key, expires_at)} with expires_at on the monotonic clock.
+# Keys are stored already constructed so jwt.decode skips the JWK -> EC key conversion per request.
+_jwks_cache: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+# In-flight JWKS fetches per Supabase project, so concurrent misses share one HTTP request
+_jwks_inflight: Dict[str, asyncio.Future] = {}
+# Last JWKS ETag per Supabase project, sent back as If-None-Match on refresh
+_jwks_etags: Dict[str, str] = {}
+_JWKS_CACHE_TTL = 600  # Default to 10 minutes when Supabase sends no max-age
+
+# Verified token cache: {blake2b(token): payload}, LRU-bounded and valid until payload["exp"]
+_token_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_TOKEN_CACHE_MAXSIZE = 10_000
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _get_cached_payload(cache_key: bytes) -> Optional[Dict[str, Any]]:
+    payload = _token_cache.get(cache_key)
+    if payload is None:
+        return None
+    if payload["exp"] <= time.time():
+        _token_cache.pop(cache_key, None)
+        return None
+    _token_cache.move_to_end(cache_key)
+    return payload
+
+def _cache_payload(cache_key: bytes, payload: Dict[str, Any]) -> None:
+    # Tokens without an expiry are never cached
+    if not isinstance(payload.get("exp"), (int, float)):
+        return
+    _token_cache[cache_key] = payload
+    _token_cache.move_to_end(cache_key)
+    while len(_token_cache) > _TOKEN_CACHE_MAXSIZE:
+        _token_cache.popitem(last=False)
+
+def _get_cached_key(kid: str, supabase_url: str) -> Optional[Any]:
+    entry = _jwks_cache.get((supabase_url, kid))
+    if entry and time.monotonic() < entry[1]:
+        return entry[0]
+    return None
+
+def _parse_max_age(cache_control: str) -> Optional[int]:
+    """Return the max-age (seconds) from a Cache-Control header, if present."""
+    for directive in cache_control.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "max-age" and value.strip().isdigit():
+            return int(value)
+    return None
+
+def _jwks_ttl(headers: httpx.Headers) -> float:
+    """Cache lifetime from Cache-Control max-age, then Expires, else the default TTL."""
+    max_age = _parse_max_age(headers.get("Cache-Control", ""))
+    if max_age is not None:
+        return max_age
+
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return max(0.0, (parsedate_to_datetime(expires) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+    return _JWKS_CACHE_TTL
+
+async def _refresh_jwks(supabase_url: str, client: httpx.AsyncClient) -> None:
+    """Fetch the JWKS document and replace every cached key for this Supabase project."""
     jwks_url = f"{supabase_url}/auth/v1/.well-known/jwks.json"
 
     anon_key = os.getenv("SUPABASE_ANON_KEY")
     headers = {"apikey": anon_key} if anon_key else {}
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(jwks_url, headers=headers)
-        response.raise_for_status()
-        jwks = response.json()
-
-    now = time.time()
+    etag = _jwks_etags.get(supabase_url)
+    if etag:
+        headers["If-None-Match"] = etag
+
+    response = await client.get(jwks_url, headers=headers)
+    expires_at = time.monotonic() + _jwks_ttl(response.headers)
+
+    # 304: keys are unchanged, only extend the lifetime of what we already hold
+    if response.status_code == 304:
+        for cache_key in [k for k in _jwks_cache if k[0] == supabase_url]:
+            _jwks_cache[cache_key] = (_jwks_cache[cache_key][0], expires_at)
+        return
+
+    response.raise_for_status()
+    jwks = response.json()
+
+    if response.headers.get("ETag"):
+        _jwks_etags[supabase_url] = response.headers["ETag"]
+    else:
+        _jwks_etags.pop(supabase_url, None)
+
+    # Drop keys that were rotated out, then cache every key in the new document
+    for cache_key in [k for k in _jwks_cache if k[0] == supabase_url]:
+        del _jwks_cache[cache_key]
     for key in jwks["keys"]:
-        _jwks_cache[key["kid"]] = (key, now)
-
-    if kid in _jwks_cache:
-        return _jwks_cache[kid][0]
+        try:
+            public_key = PyJWK(key).key  # cryptography public key object
+        except (PyJWKError, jwt.InvalidKeyError) as e:
+            print(f"[JWT] Skipping unsupported JWKS key {key.get('kid')}: {e}")
+            continue
+        _jwks_cache[(supabase_url, key["kid"])] = (public_key, expires_at)
+
+async def _refresh_jwks_once(supabase_url: str, client: httpx.AsyncClient) -> None:
+    """Single-flight wrapper around _refresh_jwks: join a running fetch or start one."""
+    while (inflight := _jwks_inflight.get(supabase_url)) is not None:
+        try:
+            # shield: a cancelled waiter must not cancel the fetch other requests share
+            await asyncio.shield(inflight)
+            return
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+        # The request running the fetch was cancelled: join the replacement fetch another
+        # waiter may already have started, and only fetch ourselves if there is none
+
+    future = asyncio.get_running_loop().create_future()
+    _jwks_inflight[supabase_url] = future
+    try:
+        await _refresh_jwks(supabase_url, client)
+        future.set_result(None)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved so a fetch with no waiters doesn't log a warning
+        raise
+    finally:
+        if _jwks_inflight.get(supabase_url) is future:
+            del _jwks_inflight[supabase_url]
+
+async def get_public_key(kid: str, supabase_url: str, client: httpx.AsyncClient) -> Any:
+    """Fetch the public key from Supabase JWKS endpoint (cached), reusing the shared app client."""
+    public_key = _get_cached_key(kid, supabase_url)
+    if public_key is not None:
+        return public_key
+
+    # Cache miss, expired entry or unknown kid (key rotation): refetch once
+    await _refresh_jwks_once(supabase_url, client)
+    public_key = _get_cached_key(kid, supabase_url)
+
+    if public_key is not None:
+        return public_key
     raise HTTPException(status_code=401, detail="Public key not found")
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> Dict[str, Any]:
-    supabase_url = os.getenv("SUPABASE_URL")
-
-    # Debug mode (always works for dev)
-    debug_token = os.getenv("DEBUG_TOKEN", "super-secret-debug-token")
-    if credentials and credentials.credentials == debug_token:
-        return {"sub": "debug-user", "email": "you@localhost"}
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> Dict[str, Any]:
+    """Router-level auth dependency: verifies the bearer token and exposes it as request.state.user."""
+    user = await _verify_credentials(request, credentials)
+    request.state.user = user
+    return user
+
+async def _verify_credentials(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials],
+) -> Dict[str, Any]:
+    supabase_url = SUPABASE_URL
+
+    # Debug mode (always works for dev); constant-time compare to avoid leaking the token
+    if credentials and hmac.compare_digest(credentials.credentials.encode(), DEBUG_TOKEN):
+        return _DEBUG_USER
 
     # Real Supabase JWT verification (new signing keys)
     if not supabase_url or not credentials:
-        raise HTTPException(status_code=401, detail="Missing token or Supabase URL")
+        raise HTTPException(
+            status_code=401,
+            detail="Missing token or Supabase URL",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     token = credentials.credentials
+
+    # Same bearer token already verified: skip the ES256 signature check until it expires
+    cache_key = _token_cache_key(token)
+    payload = _get_cached_payload(cache_key)
+    if payload is not None:
+        return payload
+
     try:
         # Get unverified header to extract kid and algorithm
         unverified_header = jwt.get_unverified_header(token)
@@ -60,31 +208,29 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(b
         print(f"[JWT] Token algorithm: {token_alg}, kid: {kid}")
 
         if not kid:
-            raise JWTError("No kid in token")
+            raise jwt.InvalidTokenError("No kid in token")
 
         # Fetch matching public key
-        public_key = await get_public_key(kid, supabase_url)
+        public_key = await get_public_key(kid, supabase_url, request.app.state.http)
         print(f"[JWT] Public key fetched successfully")
 
-        # Verify token with public key
+        # Verify signature, audience, issuer and expiry in one pass
         payload = jwt.decode(
             token,
-            public_key,
+            key=public_key,
             algorithms=["ES256"],  # ECC P-256 = ES256
             audience="authenticated",
-            options={"verify_signature": True},
+            issuer=f"{supabase_url}/auth/v1",
+            options={"require": ["exp", "iss", "aud"]},
         )
 
-        # Verify issuer
-        actual_issuer = payload.get("iss")
-        expected_issuer = f"{supabase_url}/auth/v1"
-        print(f"[JWT] Issuer check - Expected: '{expected_issuer}', Actual: '{actual_issuer}'")
-
-        if actual_issuer != expected_issuer:
-            raise JWTError("Invalid issuer")
-
         print(f"[JWT] ✅ Token verified successfully")
+        _cache_payload(cache_key, payload)
         return payload
-    except (JWTError, JWKError, httpx.HTTPError) as e:
+    except (PyJWTError, httpx.HTTPError) as e:
         print(f"[JWT] ❌ Verification failed: {type(e).__name__}: {str(e)}")
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
\ No newline at end of file
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
\ No newline at end of file
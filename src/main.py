@@ -2,17 +2,16 @@
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables first
 
+import asyncio
 import os
 
 import httpx
-from fastapi import FastAPI, Request, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, FastAPI, Depends, HTTPException
+from fastapi.security import HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
 from enum import Enum
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from google.cloud import vision
 
 from prometheus_fastapi_instrumentator import Instrumentator
 
@@ -38,13 +37,20 @@ class Tags(str, Enum):
     users = "User Management"
     items = "Items"
 
-# Database lifecycle management
+# Database + shared HTTP client lifecycle management
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Connect to database
     await connect_db()
+    # One pooled client for outbound calls (e.g. Supabase JWKS) so we keep
+    # connections alive instead of paying a TLS handshake per request
+    app.state.http = httpx.AsyncClient(
+        timeout=5.0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    )
     yield
-    # Shutdown: Disconnect from database
+    # Shutdown: Close the shared client, then disconnect from database
+    await app.state.http.aclose()
     await disconnect_db()
 
 app = FastAPI(
@@ -79,11 +85,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Everything on this router (and every module router) requires a valid Supabase token.
+# Public paths (/health, /snowboard, /docs, /redoc, /openapi.json, /metrics) stay on `app`.
+protected = APIRouter(dependencies=[Depends(get_current_user)])
+
 # Register module routers
-app.include_router(profile_router)
-app.include_router(scan_and_upload_router)
-app.include_router(class_router)
-app.include_router(homework_router)
+app.include_router(profile_router, dependencies=[Depends(get_current_user)])
+app.include_router(scan_and_upload_router, dependencies=[Depends(get_current_user)])
+app.include_router(class_router, dependencies=[Depends(get_current_user)])
+app.include_router(homework_router, dependencies=[Depends(get_current_user)])
 
 # PUBLIC ENDPOINTS
 @app.get("/health", tags=[Tags.health], include_in_schema=True)
@@ -94,59 +104,20 @@ async def health():
 async def health():
     return {"status": "healthy", "service": "i-love-snowboard"}
 
-# GLOBAL AUTH MIDDLEWARE (protects everything except the paths below)
-@app.middleware("http")
-async def supabase_auth_middleware(request: Request, call_next):
-    print(f"[AUTH] {request.method} {request.url.path}")
-
-    # ADD skip options to pass the cors checking to the app.add_middleware to check
-    if request.method == "OPTIONS":
-        print("[AUTH] ✅ Allowing OPTIONS (CORS preflight)")
-        return await call_next(request)
-    # These paths are always public
-    if request.url.path in {"/health", "/openapi.json", "/favicon.ico", "/metrics"} or \
-       request.url.path.startswith(("/docs", "/redoc")):
-        print(f"[AUTH] ✅ Public path")
-        return await call_next(request)
-
-    # Extract Bearer token manually (so your original get_current_user works unchanged)
-    auth_header = request.headers.get("Authorization")
-    credentials = None
-    if auth_header and auth_header.lower().startswith("bearer "):
-        token = auth_header[7:].strip()
-        credentials = HTTPAuthorizationCredentials(scheme="bearer", credentials=token)
-        print(f"[AUTH] 🔑 Token: {token[:30]}...")
-    else:
-        print("[AUTH] ❌ No Authorization header")
-
-    try:
-        user = await get_current_user(credentials)   # ← your original function, untouched
-        request.state.user = user
-        print(f"[AUTH] ✅ User: {user.get('email', user.get('sub'))}")
-    except Exception as e:
-        print(f"[AUTH] ❌ Auth failed: {type(e).__name__}: {str(e)}")
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"detail": "Invalid or missing token"},
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    return await call_next(request)
-
-# ALL ENDPOINTS BELOW ARE PROTECTED — no more Depends() spam!
-@app.get("/", tags=[Tags.home])
+# ALL ENDPOINTS BELOW ARE PROTECTED via the `protected` router dependency
+@protected.get("/", tags=[Tags.home])
 async def read_root():
     return {"message": "Welcome, authenticated user!"}
 
-@app.post("/users", tags=[Tags.users])
+@protected.post("/users", tags=[Tags.users])
 async def create_user(name: str, email: str):
     return {"id": 42, "name": name, "email": email}
 
-@app.get("/users/{user_id}", tags=[Tags.users])
+@protected.get("/users/{user_id}", tags=[Tags.users])
 async def get_user(user_id: int):
     return {"id": user_id, "name": "Milton", "email": "milton@example.com"}
 
-@app.put("/users/{user_id}", tags=[Tags.users])
+@protected.put("/users/{user_id}", tags=[Tags.users])
 async def update_user(user_id: int, name: str | None = None):
     return {"id": user_id, "updated": True, "name": name or "unchanged"}
 
@@ -158,7 +129,7 @@ class OcrStoragePathRequest(BaseModel):
     path: str  # Full object key including bucket: "AI_marking_app/folder/.../file.pdf"
 
 
-@app.post("/ocr/getConfScore", tags=[Tags.health])
+@protected.post("/ocr/getConfScore", tags=[Tags.health])
 async def test_ocr_from_storage(body: OcrStoragePathRequest):
     supabase_url = os.getenv("SUPABASE_URL")
     service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -190,8 +161,11 @@ async def test_ocr_from_storage(body: OcrStoragePathRequest):
     ext = os.path.splitext(body.path)[1].lower()
     is_pdf = ext == ".pdf" or "pdf" in content_type
 
-    gcv_client = vision.ImageAnnotatorClient()
+    # Shared gRPC client; the blocking call runs in a worker thread to keep the event loop free
+    gcv_client = GoogleCloudVisionAPI.get_client()
     if is_pdf:
-        return GoogleCloudVisionAPI._detect_pdf(gcv_client, content)
-    return GoogleCloudVisionAPI._detect_image(gcv_client, content)
+        return await asyncio.to_thread(GoogleCloudVisionAPI._detect_pdf, gcv_client, content)
+    return await asyncio.to_thread(GoogleCloudVisionAPI._detect_image, gcv_client, content)
+
 
+app.include_router(protected)
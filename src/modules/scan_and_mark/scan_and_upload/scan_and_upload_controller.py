@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Request, HTTPException
 from typing import List
+import asyncio
 import os
 import httpx
 from pydantic import BaseModel
-from google.cloud import vision
 from ....database import prisma_client
 from .pydantic_model.scan_and_upload_pydantic_model import ClassWithHomeworkResponse
 from .scan_and_upload_service import ScanAndUploadService
@@ -57,6 +57,7 @@ async def test_ocr_from_supabase(request: Request, body: OcrTestRequest):
             )
         pdf_bytes = resp.content
 
-    gcv_client = vision.ImageAnnotatorClient()
-    result = GoogleCloudVisionAPI._detect_pdf(gcv_client, pdf_bytes)
+    # Shared gRPC client; the blocking call runs in a worker thread to keep the event loop free
+    gcv_client = GoogleCloudVisionAPI.get_client()
+    result = await asyncio.to_thread(GoogleCloudVisionAPI._detect_pdf, gcv_client, pdf_bytes)
     return result
@@ -1,18 +1,29 @@
 #Ref: https://docs.cloud.google.com/vision/docs/handwriting#vision-document-text-detection-python
 import sys
+import csv
 import json
+import asyncio
+import orjson
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, Any
-import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from datetime import datetime
+from PIL import Image
 
 from models.GoogleCloudVisionAPI import GoogleCloudVisionAPI
-from models.EasyOCR import EasyOCRProcessor
 from models.PyTesseract import PyTesseractOCR
 from utils.logger import get_logger
 
 logger = get_logger(name=__name__)
 
+try:
+    from models.EasyOCR import EasyOCRProcessor
+except ImportError as e:
+    # models/EasyOCR.py is commented out on deployment (image size); EasyOCR then reports an error status
+    EasyOCRProcessor = None
+    _EASYOCR_IMPORT_ERROR = e
+
 
 class OCRComparator:
     """
@@ -20,79 +31,143 @@ class OCRComparator:
     on the same image and aggregate confidence scores.
     """
     
-    def __init__(self, image_path: str, output_dir: str = "ocr_results"):
+    def __init__(
+        self,
+        image_path: str,
+        output_dir: str = "ocr_results",
+        easy_processor: Optional["EasyOCRProcessor"] = None,
+        tess_processor: Optional[PyTesseractOCR] = None,
+    ):
         """
         Initialize the comparator.
         
         Args:
             image_path: Path to the image to process
             output_dir: Directory to save results (will be created if not exists)
+            easy_processor: Prebuilt EasyOCRProcessor to reuse across images (its model load takes seconds)
+            tess_processor: Prebuilt PyTesseractOCR to reuse across images
+        
+        Processors that are not injected are built once, on first use, from the
+        languages passed to run_all().
         """
         self.image_path = image_path
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.easy_processor = easy_processor
+        self.tess_processor = tess_processor
         self.results = {}
     
-    def run_all(self, easy_ocr_langs: list = None, pytesseract_lang: str = "eng") -> Dict[str, Any]:
-        """Run all three OCR models and collect confidence scores."""
-        logger.info(f"\n{'='*60}")
-        logger.info(f"Processing: {self.image_path}")
-        logger.info(f"{'='*60}\n")
-        
-        # Google Cloud Vision
+    async def run_all(
+        self,
+        easy_ocr_langs: list = None,
+        pytesseract_lang: str = "eng",
+        easy_ocr_result: Optional[Tuple[float, List[str]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run all three OCR models concurrently and collect confidence scores.
+
+        Each backend runs in a worker thread (asyncio.to_thread), so the network-bound
+        Google Vision call overlaps with the CPU-bound EasyOCR / PyTesseract runs and
+        the total time is roughly that of the slowest model.
+
+        easy_ocr_result: (average_confidence, texts) already computed for this image,
+        e.g. by EasyOCRProcessor.process_images in a batch run; EasyOCR is then skipped.
+        """
+        logger.info(f"\n{'='*60}\nProcessing: {self.image_path}\n{'='*60}\n")
+
+        # Read (and decode) the file once and share it with every backend. If the read fails,
+        # each backend falls back to reading the path itself and reports its own error entry.
+        raw = None
+        try:
+            raw = Path(self.image_path).read_bytes()
+        except OSError as e:
+            logger.error(f"✗ Could not read {self.image_path}: {e}")
+        image = self._decode_image(raw) if raw is not None else None
+        image_array = np.asarray(image) if image is not None else None
+
+        gcv_result, easy_result, tess_result = await asyncio.gather(
+            asyncio.to_thread(self._run_google_cloud_vision, raw),
+            asyncio.to_thread(self._run_easyocr, easy_ocr_langs, image_array, easy_ocr_result),
+            asyncio.to_thread(self._run_pytesseract, pytesseract_lang, image),
+        )
+        self.results["GoogleCloudVision"] = gcv_result
+        self.results["EasyOCR"] = easy_result
+        self.results["PyTesseract"] = tess_result
+
+        return self.results
+
+    def _decode_image(self, raw: bytes) -> Optional[Image.Image]:
+        """Decode the image once for the local backends; None (e.g. PDFs) makes them read the path."""
+        try:
+            return Image.open(BytesIO(raw)).convert("RGB")
+        except Exception as e:
+            logger.warning(f"Could not decode {self.image_path} locally, backends will read the file: {e}")
+            return None
+
+    def _run_google_cloud_vision(self, raw: Optional[bytes]) -> Dict[str, Any]:
         try:
             logger.info("Running Google Cloud Vision API...")
-            result = GoogleCloudVisionAPI.detect_document(self.image_path)
+            result = GoogleCloudVisionAPI.detect_document(self.image_path, image_bytes=raw, detail=False)
             confidence = result.get("average_confidence", 0.0)
-            self.results["GoogleCloudVision"] = {
+            logger.info(f"✓ Google Cloud Vision: {confidence:.4f}")
+            return {
                 "confidence": confidence,
                 "full_text": result.get("full_text", ""),
                 "status": "success"
             }
-            logger.info(f"✓ Google Cloud Vision: {confidence:.4f}")
         except Exception as e:
             logger.error(f"✗ Google Cloud Vision failed: {e}")
-            self.results["GoogleCloudVision"] = {"confidence": 0.0, "status": f"error: {str(e)}"}
-        
-        # EasyOCR
+            return {"confidence": 0.0, "status": f"error: {str(e)}"}
+
+    def _run_easyocr(
+        self,
+        easy_ocr_langs: list = None,
+        image_array: Optional[np.ndarray] = None,
+        easy_ocr_result: Optional[Tuple[float, List[str]]] = None,
+    ) -> Dict[str, Any]:
         try:
-            logger.info("Running EasyOCR...")
-            processor = EasyOCRProcessor(languages=easy_ocr_langs or ["en"], gpu=False)
-            avg_confidence, texts = processor.process_image(self.image_path)
-            self.results["EasyOCR"] = {
+            if easy_ocr_result is not None:
+                avg_confidence, texts = easy_ocr_result
+            else:
+                logger.info("Running EasyOCR...")
+                if self.easy_processor is None:
+                    if EasyOCRProcessor is None:
+                        raise ImportError(f"EasyOCR is not available: {_EASYOCR_IMPORT_ERROR}")
+                    self.easy_processor = EasyOCRProcessor(languages=easy_ocr_langs or ["en"])
+                avg_confidence, texts = self.easy_processor.process_image(self.image_path, image_array=image_array)
+            logger.info(f"✓ EasyOCR: {avg_confidence:.4f}")
+            return {
                 "confidence": avg_confidence,
                 "full_text": " ".join(texts),
                 "status": "success"
             }
-            logger.info(f"✓ EasyOCR: {avg_confidence:.4f}")
         except Exception as e:
             logger.error(f"✗ EasyOCR failed: {e}")
-            self.results["EasyOCR"] = {"confidence": 0.0, "status": f"error: {str(e)}"}
-        
-        # PyTesseract
+            return {"confidence": 0.0, "status": f"error: {str(e)}"}
+
+    def _run_pytesseract(self, pytesseract_lang: str = "eng", image: Optional[Image.Image] = None) -> Dict[str, Any]:
         try:
             logger.info("Running PyTesseract...")
-            processor = PyTesseractOCR(lang=pytesseract_lang)
-            result = processor.process_image_with_confidence(self.image_path, min_confidence=0.0)
-            
+            if self.tess_processor is None:
+                self.tess_processor = PyTesseractOCR(lang=pytesseract_lang)
+            result = self.tess_processor.process_image_with_confidence(self.image_path, min_confidence=0.0, image=image)
+
             if result is None:
                 raise Exception("PyTesseract returned None")
-            
+
             confidence = result.get("average_confidence", 0.0)
             full_text = " ".join([item["text"] for item in result.get("data", [])])
-            
-            self.results["PyTesseract"] = {
+
+            logger.info(f"✓ PyTesseract: {confidence:.4f}")
+            return {
                 "confidence": confidence,
                 "full_text": full_text,
                 "status": "success"
             }
-            logger.info(f"✓ PyTesseract: {confidence:.4f}")
         except Exception as e:
             logger.error(f"✗ PyTesseract failed: {e}")
-            self.results["PyTesseract"] = {"confidence": 0.0, "status": f"error: {str(e)}"}
-        
-        return self.results
-    
+            return {"confidence": 0.0, "status": f"error: {str(e)}"}
+
     def export_to_csv(self, filename: str = None) -> str:
         """
         Export results to a pandas-readable CSV file.
@@ -113,9 +188,10 @@ class OCRComparator:
         
         output_path = self.output_dir / filename
         
-        # Prepare data for DataFrame
+        # Prepare rows for the CSV writer
         data = []
         image_name = Path(self.image_path).name
+        exported_at = datetime.now().isoformat()  # one timestamp for every row of this export
         
         for model_name, model_data in self.results.items():
             data.append({
@@ -124,12 +200,14 @@ class OCRComparator:
                 "confidence_score": model_data.get("confidence", 0.0),
                 "status": model_data.get("status", "unknown"),
                 "extracted_text_preview": model_data.get("full_text", "")[:100],  # First 100 chars
-                "timestamp": datetime.now().isoformat()
+                "timestamp": exported_at
             })
         
-        # Create DataFrame and save
-        df = pd.DataFrame(data)
-        df.to_csv(output_path, index=False, encoding="utf-8")
+        # Write rows with the stdlib csv module (no pandas import for a handful of rows)
+        with output_path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(data[0].keys()))
+            writer.writeheader()
+            writer.writerows(data)
         logger.info(f"\n✓ Results exported to: {output_path}")
         
         return str(output_path)
@@ -160,8 +238,14 @@ class OCRComparator:
             "models": self.results
         }
         
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(full_results, f, indent=2, ensure_ascii=False)
+        try:
+            # orjson emits UTF-8 bytes directly (same output as ensure_ascii=False)
+            payload = orjson.dumps(full_results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # Fall back to stdlib json for types orjson refuses to serialize
+            payload = json.dumps(full_results, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+        with open(output_path, "wb") as f:
+            f.write(payload)
         
         logger.info(f"✓ Detailed results exported to: {output_path}")
         return str(output_path)
@@ -172,46 +256,87 @@ class OCRComparator:
             logger.warning("No results. Run run_all() first.")
             return
         
-        logger.info("\n" + "="*80)
-        logger.info("OCR COMPARISON SUMMARY")
-        logger.info("="*80)
+        # Build the whole table first and emit it as a single log record
+        lines = ["", "="*80, "OCR COMPARISON SUMMARY", "="*80]
         
         for model_name, model_data in self.results.items():
             confidence = model_data.get("confidence", 0.0)
             status = model_data.get("status", "unknown")
-            logger.info(f"  {model_name:20} | Confidence: {confidence:8.4f} | Status: {status}")
+            lines.append(f"  {model_name:20} | Confidence: {confidence:8.4f} | Status: {status}")
         
         # Calculate average and best model
         successful_models = {k: v for k, v in self.results.items() if v.get("status") == "success"}
         if successful_models:
             avg_confidence = sum(v["confidence"] for v in successful_models.values()) / len(successful_models)
             best_model = max(successful_models.items(), key=lambda x: x[1]["confidence"])
-            logger.info("="*80)
-            logger.info(f"  Average Confidence: {avg_confidence:.4f}")
-            logger.info(f"  Best Model: {best_model[0]} ({best_model[1]['confidence']:.4f})")
-        logger.info("="*80 + "\n")
+            lines.append("="*80)
+            lines.append(f"  Average Confidence: {avg_confidence:.4f}")
+            lines.append(f"  Best Model: {best_model[0]} ({best_model[1]['confidence']:.4f})")
+        lines.append("="*80 + "\n")
+        logger.info("\n".join(lines))
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        logger.info("Usage: python BestOCR.py <path-to-image>")
-        logger.info("Example: python BestOCR.py ./images/sample.jpg")
+        logger.info(
+            "Usage: python BestOCR.py <path-to-image> [<path-to-image> ...]\n"
+            "Example: python BestOCR.py ./images/sample.jpg ./images/sample2.png"
+        )
         sys.exit(1)
     
-    image_path = sys.argv[1]
-    
-    # Initialize comparator
-    comparator = OCRComparator(image_path, output_dir="ocr_results")
+    image_paths = sys.argv[1:]
     
-    # Run all models
-    comparator.run_all()
+    # Build the processors once and reuse them for every image (EasyOCR loads its models here).
+    # A failed EasyOCR load is not fatal: each image then reports it as EasyOCR's error entry.
+    easy_processor = None
+    try:
+        if EasyOCRProcessor is None:
+            raise ImportError(f"EasyOCR is not available: {_EASYOCR_IMPORT_ERROR}")
+        easy_processor = EasyOCRProcessor(languages=["en"])
+    except Exception as e:
+        logger.error(f"✗ EasyOCR could not be loaded: {e}")
+    tess_processor = PyTesseractOCR(lang="eng")
     
-    # Print summary
-    comparator.print_summary()
-    
-    # Export results
-    csv_path = comparator.export_to_csv()
-    json_path = comparator.export_to_json()
+    # readtext_batched needs equal-sized inputs (or a resize target, which would distort the
+    # aspect ratio), so batch EasyOCR per group of same-sized images; the rest run per image
+    easy_ocr_results = [None] * len(image_paths)
+    same_size: Dict[Tuple[int, int], List[int]] = {}
+    for index, image_path in enumerate(image_paths if easy_processor is not None else []):
+        try:
+            with Image.open(image_path) as header:  # reads the header only, not the pixels
+                same_size.setdefault(header.size, []).append(index)
+        except Exception:
+            pass  # e.g. PDFs: left to the per-image run
+    for size, indices in same_size.items():
+        if len(indices) < 2:
+            continue
+        try:
+            logger.info(f"Running EasyOCR (batched) on {len(indices)} images of size {size}...")
+            batch_results = easy_processor.process_images([image_paths[i] for i in indices])
+            for index, batch_result in zip(indices, batch_results):
+                easy_ocr_results[index] = batch_result
+        except Exception as e:
+            logger.error(f"✗ Batched EasyOCR failed, running per image: {e}")
     
-    logger.info(f"CSV output: {csv_path}")
-    logger.info(f"JSON output: {json_path}")
\ No newline at end of file
+    for image_path, easy_ocr_result in zip(image_paths, easy_ocr_results):
+        # Initialize comparator
+        comparator = OCRComparator(
+            image_path,
+            output_dir="ocr_results",
+            easy_processor=easy_processor,
+            tess_processor=tess_processor,
+        )
+        
+        # Run all models
+        asyncio.run(comparator.run_all(easy_ocr_result=easy_ocr_result))
+        
+        # Print summary
+        comparator.print_summary()
+        
+        # Export results (one file per image)
+        stem = Path(image_path).stem
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_path = comparator.export_to_csv(f"ocr_comparison_{stem}_{timestamp}.csv")
+        json_path = comparator.export_to_json(f"ocr_comparison_{stem}_{timestamp}.json")
+        
+        logger.info(f"CSV output: {csv_path}\nJSON output: {json_path}")
@@ -1,33 +1,54 @@
 # # Removing this due to size constraints on deployment
 # import easyocr
-# import numpy as np
+# import torch
 # from utils.logger import get_logger
 # import sys
 
 # logger = get_logger(name=__name__)
 
 # class EasyOCRProcessor:
-#     def __init__(self, languages=['en'], gpu=False):
+#     def __init__(self, languages=['en'], gpu=None):
 #         """
 #         Initialize the EasyOCR reader.
         
 #         :param languages: List of languages to support (e.g., ['en', 'fr'] for English and French).
-#         :param gpu: Set to True to use GPU if available (requires CUDA).
+#         :param gpu: True/False to force GPU (CUDA) on or off; None (default) uses CUDA when torch can see it.
 #         """
+#         if gpu is None:
+#             gpu = torch.cuda.is_available()
 #         self.reader = easyocr.Reader(languages, gpu=gpu)
     
-#     def process_image(self, image_path):
+#     def process_image(self, image_path, image_array=None):
 #         """
 #         Process an image file to extract text using OCR.
         
 #         :param image_path: Path to the image file (e.g., 'path/to/image.jpg').
+#         :param image_array: Optional already-decoded image (numpy array); skips reading image_path.
 #         :return: Tuple of (average_confidence, detected_texts)
 #             - average_confidence: Float representing the average confidence score (0 to 1).
 #             - detected_texts: List of strings, each being a detected text snippet.
 #         """
 #         # Run OCR on the image
-#         results = self.reader.readtext(image_path)
+#         results = self.reader.readtext(image_array if image_array is not None else image_path)
+#         return self._summarize(results)
+    
+#     def process_images(self, image_paths, batch_size=8, n_width=None, n_height=None):
+#         """
+#         Process several images in one batched inference (readtext_batched), amortizing GPU launches.
         
+#         :param image_paths: List of image paths (or decoded numpy arrays).
+#         :param batch_size: Number of text regions recognized per forward pass.
+#         :param n_width, n_height: Resize target; required by EasyOCR when the images differ in size.
+#         :return: List of (average_confidence, detected_texts) tuples, one per input image.
+#         """
+#         batched_results = self.reader.readtext_batched(
+#             image_paths, n_width=n_width, n_height=n_height, batch_size=batch_size
+#         )
+#         return [self._summarize(results) for results in batched_results]
+    
+#     @staticmethod
+#     def _summarize(results):
+#         """Reduce raw readtext results to (average_confidence, detected_texts)."""
 #         if not results:
 #             return 0.0, []  # No detections
         
@@ -36,13 +57,13 @@
 #         texts = [result[1] for result in results]       # Text is the 2nd element
         
 #         # Compute average confidence
-#         avg_confidence = np.mean(confidences)
+#         avg_confidence = sum(confidences) / len(confidences)  # plain Python: cheaper than np.mean on a short list
         
 #         return avg_confidence, texts 
 
 # # Example usage (uncomment to test):
 # if __name__ == "__main__":
-#     processor = EasyOCRProcessor(languages=['en'], gpu=False)
+#     processor = EasyOCRProcessor(languages=['en'])
 #     image_path = sys.argv[1]
 #     avg_conf, texts = processor.process_image(image_path=image_path)
 #     logger.info(f"Average Confidence: {avg_conf}")
@@ -34,6 +34,7 @@ https://console.cloud.google.com/marketplace/product/google/vision.googleapis.co
 '''
 from google.cloud import vision
 from typing import Dict, Any, List
+import functools
 import json
 import os
 import sys
@@ -41,8 +42,18 @@ from utils.logger import get_logger
 
 logger = get_logger(name=__name__)
 
+@functools.lru_cache(maxsize=1)
+def _client() -> vision.ImageAnnotatorClient:
+    # One client (and gRPC channel) per process; creating it per call redoes channel + TLS setup
+    return vision.ImageAnnotatorClient()
+
 class GoogleCloudVisionAPI:
 
+    @staticmethod
+    def get_client() -> vision.ImageAnnotatorClient:
+        """Shared, lazily created ImageAnnotatorClient (thread-safe, reuse it across calls)."""
+        return _client()
+
     @staticmethod
     def _parse_annotation(annotation) -> List[Dict[str, Any]]:
         """Parse a full_text_annotation into the pages/blocks/paragraphs/words structure."""
@@ -61,36 +72,58 @@ class GoogleCloudVisionAPI:
                     "paragraphs": []
                 }
                 for paragraph in block.paragraphs:
-                    para_text = "".join([symbol.text for word in paragraph.words for symbol in word.symbols])
-                    paragraph_data = {
-                        "text": para_text,
-                        "confidence": paragraph.confidence,
-                        "words": []
-                    }
+                    # Walk each word's symbols once; the paragraph text is the join of its word texts
+                    words_data = []
                     for word in paragraph.words:
-                        word_text = "".join([symbol.text for symbol in word.symbols])
-                        word_data = {
-                            "text": word_text,
+                        symbols = word.symbols
+                        symbol_texts = [symbol.text for symbol in symbols]
+                        words_data.append({
+                            "text": "".join(symbol_texts),
                             "confidence": word.confidence,
                             "symbols": [
                                 {
-                                    "text": symbol.text,
+                                    "text": text,
                                     "confidence": symbol.confidence,
                                     "is_break": hasattr(symbol.property, 'detected_break')
                                 }
-                                for symbol in word.symbols
+                                for symbol, text in zip(symbols, symbol_texts)
                             ]
-                        }
-                        paragraph_data["words"].append(word_data)
-                    block_data["paragraphs"].append(paragraph_data)
+                        })
+                    block_data["paragraphs"].append({
+                        "text": "".join([word_data["text"] for word_data in words_data]),
+                        "confidence": paragraph.confidence,
+                        "words": words_data
+                    })
                 page_data["blocks"].append(block_data)
             pages.append(page_data)
         return pages
 
     @staticmethod
-    def detect_document(path: str) -> Dict[str, Any]:
+    def _pages(annotation, detail: bool = True) -> List[Dict[str, Any]]:
+        """Full parsed pages, or just the page-level confidences when detail is False."""
+        if detail:
+            return GoogleCloudVisionAPI._parse_annotation(annotation)
+        return [{"confidence": page.confidence} for page in annotation.pages]
+
+    @staticmethod
+    def _average_confidence(pages: List[Dict[str, Any]]) -> float | None:
+        """Average the page-level confidences already read during _parse_annotation (no extra tree walk)."""
+        total = 0.0
+        count = 0
+        for page in pages:
+            confidence = page.get("confidence")
+            if confidence is not None:
+                total += confidence
+                count += 1
+        return total / count if count else None
+
+    @staticmethod
+    def detect_document(path: str, image_bytes: bytes | None = None, detail: bool = True) -> Dict[str, Any]:
         '''
         Supports images (.jpg, .jpeg, .png) and PDFs (.pdf).
+        Pass image_bytes when the file is already in memory; path is then only used for the extension.
+        Pass detail=False when only full_text / average_confidence are needed: the nested
+        pages/blocks/paragraphs/words structure is then not built and result["pages"] is omitted.
 
         result["full_text"]: Extracted text (all pages joined for PDFs)
         result["average_confidence"]: Average confidence score
@@ -100,23 +133,26 @@ class GoogleCloudVisionAPI:
         Note: Synchronous PDF processing supports up to 5 pages. Use GCS +
         async_batch_annotate_files for larger documents.
         '''
-        client = vision.ImageAnnotatorClient()
+        client = GoogleCloudVisionAPI.get_client()
 
-        with open(path, "rb") as f:
-            content = f.read()
+        if image_bytes is not None:
+            content = image_bytes
+        else:
+            with open(path, "rb") as f:
+                content = f.read()
 
         ext = os.path.splitext(path)[1].lower()
         print(f"[GoogleCloudVisionAPI] File extension: {ext}")
 
         if ext == ".pdf":
             print("[GoogleCloudVisionAPI] Routing to: _detect_pdf (annotate_file, mime_type=application/pdf)")
-            return GoogleCloudVisionAPI._detect_pdf(client, content)
+            return GoogleCloudVisionAPI._detect_pdf(client, content, detail)
         else:
             print("[GoogleCloudVisionAPI] Routing to: _detect_image (document_text_detection)")
-            return GoogleCloudVisionAPI._detect_image(client, content)
+            return GoogleCloudVisionAPI._detect_image(client, content, detail)
 
     @staticmethod
-    def _detect_image(client, content) -> Dict[str, Any]:
+    def _detect_image(client, content, detail: bool = True) -> Dict[str, Any]:
         image = vision.Image(content=content)
         print(f"What is this image content type? {type(image.content)}")  # Should be bytes
 
@@ -130,19 +166,20 @@ class GoogleCloudVisionAPI:
 
         full_text = response.full_text_annotation.text if response.full_text_annotation else ""
 
-        pages = GoogleCloudVisionAPI._parse_annotation(response.full_text_annotation)
-        page_confidences = [p["confidence"] for p in pages if p.get("confidence") is not None]
-        average_confidence = sum(page_confidences) / len(page_confidences) if page_confidences else None
+        pages = GoogleCloudVisionAPI._pages(response.full_text_annotation, detail)
+        average_confidence = GoogleCloudVisionAPI._average_confidence(pages)
 
-        return {
+        result = {
             "average_confidence": average_confidence,
             "full_text": full_text,
             "total_pages": len(pages),
-            "pages": pages
         }
+        if detail:
+            result["pages"] = pages
+        return result
 
     @staticmethod
-    def _detect_pdf(client, content) -> Dict[str, Any]:
+    def _detect_pdf(client, content, detail: bool = True) -> Dict[str, Any]:
         '''
         PDF processing via annotate_file (synchronous, up to 5 pages).
         Each page entry in result["pages"] includes a "page_number" key (1-indexed).
@@ -174,25 +211,26 @@ class GoogleCloudVisionAPI:
             page_number = page_response.context.page_number
             full_text_parts.append(page_response.full_text_annotation.text)
 
-            pages = GoogleCloudVisionAPI._parse_annotation(page_response.full_text_annotation)
+            pages = GoogleCloudVisionAPI._pages(page_response.full_text_annotation, detail)
             all_pages.extend({"page_number": page_number, **page} for page in pages)
 
-        page_confidences = [p["confidence"] for p in all_pages if p.get("confidence") is not None]
-        average_confidence = sum(page_confidences) / len(page_confidences) if page_confidences else None
+        average_confidence = GoogleCloudVisionAPI._average_confidence(all_pages)
 
-        return {
+        result = {
             "average_confidence": average_confidence,
             "full_text": "\n".join(full_text_parts),
             "total_pages": len(all_pages),
-            "pages": all_pages
         }
+        if detail:
+            result["pages"] = all_pages
+        return result
         
 
     # Simple version if you just want text + average confidence
     @staticmethod
     def detect_document_simple(path: str) -> tuple[str, float]:
         """Returns (extracted_text, average_confidence)"""
-        data = GoogleCloudVisionAPI.detect_document(path)
+        data = GoogleCloudVisionAPI.detect_document(path, detail=False)
         return data["full_text"], data.get("average_confidence", 0.0)
 
 if __name__ == "__main__":
@@ -1,33 +1,292 @@
+import atexit
+import csv
+import ctypes
+import ctypes.util
+import hashlib
+import io
+import logging
+import os
+import re
 import sys
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing import Pool
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator, Sequence, Tuple, Union
 
+# One OpenMP thread per Tesseract process: we parallelize across processes instead, and
+# N multi-threaded Tesseracts competing for the same cores is dramatically slower.
+# Must be set before pytesseract spawns anything so the child processes inherit it.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+import cv2
+import numpy as np
 import pytesseract
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 from pytesseract import Output
 from utils.logger import get_logger
 
+try:
+    # Optional in-process bindings to libtesseract (no subprocess, model loaded once per instance)
+    import tesserocr
+    from tesserocr import RIL
+except ImportError:
+    tesserocr = None
+
 logger = get_logger(name=__name__)
 
+# Page-iterator levels of Tesseract's C API (tesseract/publictypes.h PageIteratorLevel)
+_RIL_BLOCK, _RIL_PARA, _RIL_TEXTLINE, _RIL_WORD = 0, 1, 2, 3
+
+# (restype, argtypes) of the libtesseract C API functions used by _CTessAPI
+_C_PROTOTYPES = {
+    'TessBaseAPICreate': (ctypes.c_void_p, []),
+    'TessBaseAPIInit2': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]),
+    'TessBaseAPISetPageSegMode': (None, [ctypes.c_void_p, ctypes.c_int]),
+    'TessBaseAPISetVariable': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]),
+    'TessBaseAPISetImage': (None, [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]),
+    'TessBaseAPIRecognize': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p]),
+    'TessBaseAPIGetUTF8Text': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'TessBaseAPIGetIterator': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'TessBaseAPIEnd': (None, [ctypes.c_void_p]),
+    'TessBaseAPIDelete': (None, [ctypes.c_void_p]),
+    'TessDeleteText': (None, [ctypes.c_void_p]),
+    'TessResultIteratorDelete': (None, [ctypes.c_void_p]),
+    'TessResultIteratorNext': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int]),
+    'TessResultIteratorConfidence': (ctypes.c_float, [ctypes.c_void_p, ctypes.c_int]),
+    'TessResultIteratorGetUTF8Text': (ctypes.c_void_p, [ctypes.c_void_p, ctypes.c_int]),
+    'TessResultIteratorGetPageIterator': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'TessPageIteratorIsAtBeginningOf': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int]),
+    'TessPageIteratorBoundingBox': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int] + [ctypes.POINTER(ctypes.c_int)] * 4),
+}
+
+
+def _load_libtesseract() -> Optional[ctypes.CDLL]:
+    """Load libtesseract for the ctypes binding; None when the shared library is not available."""
+    for name in (ctypes.util.find_library('tesseract'), 'libtesseract.so.5', 'libtesseract.so.4'):
+        if not name:
+            continue
+        try:
+            lib = ctypes.CDLL(name)
+            for func_name, (restype, argtypes) in _C_PROTOTYPES.items():
+                func = getattr(lib, func_name)
+                func.restype = restype
+                func.argtypes = argtypes
+        except (OSError, AttributeError):
+            continue
+        return lib
+    return None
+
+
+# Only needed when tesserocr is missing: the ctypes binding is the second in-process option
+_libtess = _load_libtesseract() if tesserocr is None else None
+
+
+class _CTessAPI:
+    """
+    Minimal ctypes binding to libtesseract's TessBaseAPI.
+    
+    Mirrors the subset of tesserocr.PyTessBaseAPI that PyTesseractOCR uses, so it can
+    stand in for it when tesserocr is not installed. Images are handed to Tesseract
+    straight from the numpy buffer, with no temp file or subprocess in between.
+    """
+    
+    def __init__(self, lang: str, psm: int, oem: int) -> None:
+        self._lib = _libtess
+        self._handle = self._lib.TessBaseAPICreate()
+        if self._lib.TessBaseAPIInit2(self._handle, None, lang.encode(), oem) != 0:
+            self._lib.TessBaseAPIDelete(self._handle)
+            self._handle = None
+            raise RuntimeError(f"Failed to init libtesseract with lang={lang!r}, oem={oem}")
+        self._lib.TessBaseAPISetPageSegMode(self._handle, psm)
+    
+    def SetVariable(self, name: str, value: str) -> bool:
+        return bool(self._lib.TessBaseAPISetVariable(self._handle, name.encode(), value.encode()))
+    
+    def SetImage(self, image: Union[Image.Image, np.ndarray]) -> None:
+        # Always feed 8-bit grayscale: Tesseract binarizes internally, so the colour is not needed
+        if isinstance(image, Image.Image):
+            gray = np.asarray(image.convert('L'))
+        elif image.ndim == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        else:
+            gray = image
+        gray = np.ascontiguousarray(gray, dtype=np.uint8)
+        height, width = gray.shape
+        self._lib.TessBaseAPISetImage(self._handle, gray.ctypes.data, width, height, 1, gray.strides[0])
+    
+    def SetImageFile(self, image_path: str) -> None:
+        raw = Path(image_path).read_bytes()
+        image = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Could not decode image: {image_path}")
+        self.SetImage(image)
+    
+    def GetUTF8Text(self) -> str:
+        return self._take_text(self._lib.TessBaseAPIGetUTF8Text(self._handle))
+    
+    def iter_words(self) -> Iterator[tuple]:
+        """Recognize and yield (at_block, at_para, at_line, box, conf, text) per word."""
+        lib = self._lib
+        if lib.TessBaseAPIRecognize(self._handle, None) != 0:
+            raise RuntimeError("libtesseract recognition failed")
+        result_it = lib.TessBaseAPIGetIterator(self._handle)
+        if not result_it:
+            return
+        try:
+            page_it = lib.TessResultIteratorGetPageIterator(result_it)
+            box = [ctypes.c_int() for _ in range(4)]
+            box_refs = [ctypes.byref(value) for value in box]
+            while True:
+                has_box = lib.TessPageIteratorBoundingBox(page_it, _RIL_WORD, *box_refs)
+                yield (
+                    bool(lib.TessPageIteratorIsAtBeginningOf(page_it, _RIL_BLOCK)),
+                    bool(lib.TessPageIteratorIsAtBeginningOf(page_it, _RIL_PARA)),
+                    bool(lib.TessPageIteratorIsAtBeginningOf(page_it, _RIL_TEXTLINE)),
+                    tuple(value.value for value in box) if has_box else None,
+                    lib.TessResultIteratorConfidence(result_it, _RIL_WORD),
+                    self._take_text(lib.TessResultIteratorGetUTF8Text(result_it, _RIL_WORD)),
+                )
+                if not lib.TessResultIteratorNext(result_it, _RIL_WORD):
+                    break
+        finally:
+            lib.TessResultIteratorDelete(result_it)
+    
+    def End(self) -> None:
+        if self._handle is not None:
+            self._lib.TessBaseAPIEnd(self._handle)
+            self._lib.TessBaseAPIDelete(self._handle)
+            self._handle = None
+    
+    def __del__(self) -> None:
+        self.End()
+    
+    def _take_text(self, ptr: Optional[int]) -> str:
+        # Strings returned by the C API are owned by the caller and must go back through TessDeleteText
+        if not ptr:
+            return ''
+        try:
+            return ctypes.string_at(ptr).decode('utf-8', errors='replace')
+        finally:
+            self._lib.TessDeleteText(ptr)
+
+# Column order of Tesseract's image_to_data TSV; the first ten are integers
+_DATA_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+                 'left', 'top', 'width', 'height', 'conf', 'text')
+# One recognized word (opt-in record type, as_words=True); fields are the image_to_data columns
+Word = namedtuple('Word', _DATA_COLUMNS)
+
+
+def _word_dict(*values) -> Dict[str, any]:
+    """Default per-word record: a dict keyed by the image_to_data columns."""
+    return dict(zip(_DATA_COLUMNS, values))
+
+# Per-word line logged by the __main__ demo
+_FMT = "Text: %r | Conf: %.2f | Box: (%d, %d, %d, %d)"
+
 class PyTesseractOCR:
     """
     A class for performing OCR using PyTesseract.
     
     This class encapsulates OCR functionality, allowing customization of language,
     Tesseract configuration, and more. Now includes support for confidence scores.
+    
+    When tesserocr is installed, OCR runs in-process on one PyTessBaseAPI held by the
+    instance (the traineddata loads once). Without tesserocr, libtesseract is driven
+    in-process through a small ctypes binding instead; only when neither is available
+    does every call go through the pytesseract subprocess wrapper. Use it as a context
+    manager, or call close(), to release the API.
     """
     
-    def __init__(self, lang: str = 'eng', config: str = '--psm 3') -> None:
+    # Keep image lists short: very long lists can deadlock pytesseract's stdout/stderr pipes
+    _BATCH_CHUNK_SIZE = 49
+    # Max results kept in the per-instance content-hash cache (oldest evicted first)
+    _CACHE_MAXSIZE = 256
+    # Below this many words a plain running sum beats the NumPy setup cost in _parse_data
+    _VECTORIZE_MIN_ROWS = 64
+    
+    def __init__(
+        self,
+        lang: str = 'eng',
+        config: Optional[str] = None,
+        preprocess: bool = False,
+        psm: int = 3,
+        oem: Optional[int] = None
+    ) -> None:
         """
         Initialize the OCR processor.
         
         Args:
             lang (str): Language code for Tesseract (default: 'eng' for English).
-            config (str): Tesseract configuration string (default: '--psm 3' for auto page segmentation).
+            config (Optional[str]): Full Tesseract configuration string. When omitted it is built once
+                from psm/oem as "--psm {psm} --oem {oem} -c tessedit_do_invert=0"; when given, its
+                --psm/--oem flags take precedence over the psm/oem arguments, and an explicitly
+                passed flag it lacks is appended, so every backend runs the same settings.
+            preprocess (bool): Grayscale, 2x-upscale small images and Otsu-binarize before OCR
+                (default: False, keeps already-clean inputs untouched).
+            psm (int): Page segmentation mode (default: 3, fully automatic page segmentation).
+            oem (Optional[int]): OCR engine mode. Unset, it is 1 (LSTM only - the faster neural
+                model) for the built config, and Tesseract's default (3) for an explicit config
+                without --oem, exactly as the tesseract command line would run it.
         """
         self.lang = lang
+        if config is None:
+            oem = 1 if oem is None else oem
+            # Skipping the inverted-text detection pass saves a full recognition pass on dark-on-light scans
+            config = f"--psm {psm} --oem {oem} -c tessedit_do_invert=0"
+        else:
+            # The in-process APIs must run what the pytesseract CLI would run with this string
+            psm_flag = re.search(r"--psm\s+(\d+)", config)
+            oem_flag = re.search(r"--oem\s+(\d+)", config)
+            if psm_flag:
+                psm = int(psm_flag.group(1))
+            elif psm != 3:  # 3 is also the CLI default
+                config = f"{config} --psm {psm}"
+            if oem_flag:
+                oem = int(oem_flag.group(1))
+            elif oem is not None:
+                config = f"{config} --oem {oem}"
+            else:
+                oem = 3  # OEM_DEFAULT, the CLI default
         self.config = config
-        logger.info(f"Initialized PyTesseractOCR with lang='{self.lang}' and config='{self.config}'")
+        self.psm = psm
+        self.oem = oem
+        self.preprocess = preprocess
+        self._cache: "OrderedDict[tuple, Dict[str, any]]" = OrderedDict()
+        self._init_api()
+        logger.info("Initialized PyTesseractOCR with lang=%r and config=%r", self.lang, self.config)
+    
+    def _init_api(self) -> None:
+        """Create the in-process API: tesserocr, else the ctypes binding (None -> pytesseract fallback)."""
+        self._api = None
+        self._api_lock = threading.Lock()  # a TessBaseAPI must not be used from two threads at once
+        if tesserocr is None and _libtess is None:
+            return
+        try:
+            if tesserocr is not None:
+                self._api = tesserocr.PyTessBaseAPI(lang=self.lang, psm=self.psm, oem=self.oem)
+            else:
+                self._api = _CTessAPI(lang=self.lang, psm=self.psm, oem=self.oem)
+            for name, value in re.findall(r"-c\s+([^\s=]+)=(\S+)", self.config):
+                self._api.SetVariable(name, value)
+        except RuntimeError as e:
+            logger.warning("In-process Tesseract init failed, falling back to pytesseract: %s", e)
+            self._api = None
+    
+    def close(self) -> None:
+        """Release the in-process Tesseract API (no-op on the pytesseract fallback)."""
+        if self._api is not None:
+            self._api.End()
+            self._api = None
+    
+    def __enter__(self) -> "PyTesseractOCR":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
     
     def process_image(self, image_path: str) -> Optional[str]:
         """
@@ -40,25 +299,45 @@ class PyTesseractOCR:
             Optional[str]: Extracted text, or None if an error occurs.
         """
         try:
-            path = Path(image_path)
-            if not path.exists() or not path.is_file():
-                raise FileNotFoundError(f"Image file not found: {image_path}. Use it to fix the script and re-run.")
+            # No exists()/is_file() pre-check: the read/decode below is the single stat+open,
+            # and a missing or unreadable file surfaces from it directly
+            image = None
+            if self.preprocess:
+                image, _ = self._preprocess(self._decode_image(Path(image_path).read_bytes(), image_path))
+
+            if self._api is not None:
+                logger.info("Running OCR with in-process Tesseract...")
+                with self._api_lock:
+                    if image is None:
+                        self._api.SetImageFile(str(image_path))
+                    else:
+                        self._set_api_image(image)
+                    return self._api.GetUTF8Text().strip()
 
             logger.info("Running OCR with PyTesseract...")
-            text = pytesseract.image_to_string(image_path, lang=self.lang, config=self.config)
+            text = pytesseract.image_to_string(
+                image_path if image is None else image, lang=self.lang, config=self.config
+            )
             return text.strip()
         
+        except (FileNotFoundError, UnidentifiedImageError) as e:
+            logger.error("Could not read image %s: %s", image_path, e)
+            return None
         except pytesseract.pytesseract.TesseractNotFoundError:
             logger.error("Tesseract not found. Ensure it's installed and in PATH.")
             return None
         except Exception as e:
-            logger.error(f"Error during OCR: {str(e)}")
+            logger.error("Error during OCR: %s", e)
             return None
     
     def process_image_with_confidence(
         self, 
         image_path: str, 
-        min_confidence: float = 0.0
+        min_confidence: float = 0.0,
+        image: Optional[Union[Image.Image, np.ndarray]] = None,
+        use_cache: bool = True,
+        include_data: bool = True,
+        as_words: bool = False
     ) -> Optional[Dict[str, any]]:
         """
         Perform OCR with detailed output, including confidence scores per word.
@@ -66,71 +345,496 @@ class PyTesseractOCR:
         Args:
             image_path (str): Path to the image file.
             min_confidence (float): Minimum confidence threshold (0-100) to filter results (default: 0, include all).
+            image (Optional[Union[Image.Image, np.ndarray]]): Already-decoded image (PIL or numpy);
+                when given, image_path is not re-read.
+            use_cache (bool): Reuse the result of an earlier call on identical image content with the
+                same lang/config/min_confidence (keyed by a blake2b hash of the image bytes). On by
+                default; every call still returns its own copy, so editing a result is safe. Pass
+                False to always re-run Tesseract (e.g. when comparing engine settings).
+            include_data (bool): Build the per-word records (default: True). With False, only the
+                average is computed and 'data' is an empty list.
+            as_words (bool): Return the records as (smaller) Word namedtuples instead of dicts
+                (default: False); the fields have the same names as the dict keys.
         
         Returns:
             Optional[Dict[str, any]]: A dictionary with:
                 - 'data': List of dicts (one per word/line) with keys like 'text', 'conf', 'left', 'top', etc.
+                  (Word namedtuples with the same fields when as_words=True).
                 - 'average_confidence': Float average of all confidence scores (after filtering).
                 - Or None if an error occurs.
         """
         try:
-            path = Path(image_path)
-            if not path.exists() or not path.is_file():
-                raise FileNotFoundError(f"Image file not found: {image_path}")
-            
-            logger.info(f"Loading image: {image_path}")
-            image = Image.open(path)
-            
-            # Optional: Preprocess (uncomment if needed)
-            # image = image.convert('L')  # Grayscale
-            # image = image.resize((image.width * 2, image.height * 2))  # Upscale
-            
-            logger.info("Running OCR with PyTesseract (detailed mode)...")
-            data = pytesseract.image_to_data(
-                image, 
-                lang=self.lang, 
-                config=self.config, 
-                output_type=Output.DICT
-            )
+            raw = None
+            if image is None:
+                # One open/read; a missing file raises FileNotFoundError here
+                logger.info("Loading image: %s", image_path)
+                raw = Path(image_path).read_bytes()
             
-            # Parse and filter the data
-            parsed_data: List[Dict[str, any]] = []
-            conf_scores = []
-            for i in range(len(data['text'])):
-                text = data['text'][i].strip()
-                if text:  # Skip empty entries
-                    conf = float(data['conf'][i])  # Confidence as float
-                    if conf >= min_confidence:
-                        parsed_data.append({
-                            'level': data['level'][i],
-                            'page_num': data['page_num'][i],
-                            'block_num': data['block_num'][i],
-                            'par_num': data['par_num'][i],
-                            'line_num': data['line_num'][i],
-                            'word_num': data['word_num'][i],
-                            'left': data['left'][i],
-                            'top': data['top'][i],
-                            'width': data['width'][i],
-                            'height': data['height'][i],
-                            'conf': conf,
-                            'text': text
-                        })
-                        conf_scores.append(conf)
+            cache_key = None
+            if use_cache:
+                # Hashing is ~ms, OCR is 100s of ms: identical inputs skip Tesseract entirely
+                cache_key = self._cache_key(raw, image, min_confidence, include_data, as_words)
+                if cache_key in self._cache:
+                    logger.info("Using cached OCR result (identical image content)")
+                    self._cache.move_to_end(cache_key)
+                    return self._copy_result(self._cache[cache_key])
             
-            if not conf_scores:
-                logger.warning("No text detected with confidence above threshold.")
-                return {'data': [], 'average_confidence': 0.0}
+            if image is None:
+                image = self._decode_image(raw, image_path)
             
-            avg_conf = sum(conf_scores) / len(conf_scores)
-            return {'data': parsed_data, 'average_confidence': avg_conf}
+            rows = self._recognize_rows(image)
+            result = self._parse_data(rows, min_confidence, include_data, as_words)
+            if cache_key is not None:
+                self._cache_result(cache_key, result)
+                return self._copy_result(result)
+            return result
         
+        except (FileNotFoundError, UnidentifiedImageError) as e:
+            logger.error("Could not read image %s: %s", image_path, e)
+            return None
         except pytesseract.pytesseract.TesseractNotFoundError:
             logger.error("Tesseract not found. Ensure it's installed and in PATH.")
             return None
         except Exception as e:
-            logger.error(f"Error during OCR: {str(e)}")
+            logger.error("Error during OCR: %s", e)
             return None
-
+    
+    def process_image_columns(
+        self,
+        image_path: str,
+        min_confidence: float = 0.0,
+        image: Optional[Union[Image.Image, np.ndarray]] = None
+    ) -> Optional[Dict[str, any]]:
+        """
+        Like process_image_with_confidence, but column-oriented: one NumPy array per field.
+        
+        Meant for numeric post-processing (thresholding, box clustering) where a list of
+        per-word records would have to be re-gathered into arrays anyway.
+        
+        Args:
+            image_path (str): Path to the image file.
+            min_confidence (float): Minimum confidence threshold (0-100) to filter results (default: 0, include all).
+            image (Optional[Union[Image.Image, np.ndarray]]): Already-decoded image (PIL or numpy);
+                when given, image_path is not re-read.
+        
+        Returns:
+            Optional[Dict[str, any]]: A dictionary with:
+                - one array per image_to_data column: 'level' ... 'height' as int32, 'conf' as
+                  float32 and 'text' as object, all filtered with the same mask.
+                - 'average_confidence': Float average of the kept confidence scores.
+                - Or None if an error occurs.
+        """
+        try:
+            if image is None:
+                logger.info("Loading image: %s", image_path)
+                image = self._decode_image(Path(image_path).read_bytes(), image_path)
+            return self._parse_columns(self._recognize_rows(image), min_confidence)
+        
+        except (FileNotFoundError, UnidentifiedImageError) as e:
+            logger.error("Could not read image %s: %s", image_path, e)
+            return None
+        except pytesseract.pytesseract.TesseractNotFoundError:
+            logger.error("Tesseract not found. Ensure it's installed and in PATH.")
+            return None
+        except Exception as e:
+            logger.error("Error during OCR: %s", e)
+            return None
+    
+    def _recognize_rows(self, image: Union[Image.Image, np.ndarray]) -> List[Sequence]:
+        """
+        Optionally preprocess, then run detailed OCR; rows in _DATA_COLUMNS order.
+        
+        Boxes are always in the coordinates of the image passed in, even when
+        preprocessing upscaled it for recognition.
+        """
+        scale = 1.0
+        if self.preprocess:
+            image, scale = self._preprocess(image)
+        
+        if self._api is not None:
+            logger.info("Running OCR with in-process Tesseract (detailed mode)...")
+            with self._api_lock:
+                self._set_api_image(image)
+                rows = self._api_words()
+        else:
+            logger.info("Running OCR with PyTesseract (detailed mode)...")
+            rows = self._image_to_data_rows(image)
+        return self._unscale_boxes(rows, scale) if scale != 1.0 else rows
+    
+    @staticmethod
+    def _unscale_boxes(rows: List[Sequence], scale: float) -> List[Sequence]:
+        """Map left/top/width/height back to the original image after a preprocessing upscale."""
+        unscaled: List[Sequence] = []
+        for row in rows:
+            if len(row) >= 10:
+                row = list(row)
+                row[6:10] = [round(int(value) / scale) for value in row[6:10]]
+            unscaled.append(row)
+        return unscaled
+    
+    @staticmethod
+    def _decode_image(raw: bytes, image_path: str) -> np.ndarray:
+        """
+        Decode the file bytes once, straight to grayscale.
+        
+        Tesseract binarizes a grayscale image internally anyway, so this loses nothing,
+        and pytesseract's temp file for a single-channel array is a third of the size.
+        """
+        image = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Could not decode image: {image_path}")
+        return image
+    
+    @staticmethod
+    def _preprocess(image: Union[Image.Image, np.ndarray]) -> Tuple[np.ndarray, float]:
+        """
+        Grayscale -> 2x bicubic upscale (small images only) -> Otsu binarization.
+        
+        Returns the binarized image and the scale factor applied (1.0 or 2.0), so
+        word boxes can be mapped back to the input image.
+        """
+        if isinstance(image, Image.Image):
+            gray = np.asarray(image.convert('L'))
+        elif image.ndim == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        else:
+            gray = image
+        # Tesseract is most accurate around 300 DPI; small scans benefit from a 2x upscale
+        scale = 1.0
+        if min(gray.shape[:2]) < 1000:
+            scale = 2.0
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        return binary, scale
+    
+    def _cache_key(
+        self,
+        raw: Optional[bytes],
+        image: Optional[Union[Image.Image, np.ndarray]],
+        min_confidence: float,
+        include_data: bool = True,
+        as_words: bool = False
+    ) -> tuple:
+        """Content hash of the encoded file bytes, or of the decoded pixels when only an image was given."""
+        digest = hashlib.blake2b(digest_size=16)
+        if raw is not None:
+            digest.update(raw)
+        elif isinstance(image, np.ndarray):
+            digest.update(f"{image.dtype}:{image.shape}".encode())
+            digest.update(np.ascontiguousarray(image).tobytes())
+        else:
+            digest.update(f"{image.mode}:{image.size}".encode())
+            digest.update(image.tobytes())
+        return (digest.hexdigest(), self.lang, self.config, self.preprocess, min_confidence, include_data, as_words)
+    
+    @staticmethod
+    def _copy_result(result: Dict[str, any]) -> Dict[str, any]:
+        # New outer dict, list and dict records: callers may edit what they get back,
+        # the cached entry must stay intact (Word tuples are immutable and can be shared)
+        data = result['data']
+        if data and isinstance(data[0], dict):
+            data = [dict(record) for record in data]
+        else:
+            data = list(data)
+        return {**result, 'data': data}
+    
+    def _cache_result(self, cache_key: tuple, result: Dict[str, any]) -> None:
+        self._cache[cache_key] = result
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self._CACHE_MAXSIZE:
+            self._cache.popitem(last=False)
+    
+    def _image_to_data_rows(self, image) -> List[List[str]]:
+        """
+        Run image_to_data and parse its raw TSV once (rows in _DATA_COLUMNS order).
+        
+        Output.DICT would build twelve parallel lists and convert every cell; here only
+        the rows that survive filtering in _parse_data get converted.
+        """
+        tsv = pytesseract.image_to_data(
+            image,
+            lang=self.lang,
+            config=self.config,
+            output_type=Output.STRING
+        )
+        reader = csv.reader(io.StringIO(tsv), delimiter='\t', quoting=csv.QUOTE_NONE)
+        next(reader, None)  # header
+        return list(reader)
+    
+    def _api_words(self) -> List[tuple]:
+        """
+        Recognize the image loaded into self._api and return word rows in the same
+        column layout as pytesseract's image_to_data (only word-level rows, level 5).
+        """
+        rows: List[tuple] = []
+        block_num = par_num = line_num = word_num = 0
+        for at_block, at_para, at_line, box, conf, text in self._iter_api_words():
+            # Rebuild image_to_data's block/par/line/word numbering from the iterator position
+            if at_block:
+                block_num, par_num = block_num + 1, 0
+            if at_para:
+                par_num, line_num = par_num + 1, 0
+            if at_line:
+                line_num, word_num = line_num + 1, 0
+            word_num += 1
+            
+            if box is None:
+                continue
+            left, top, right, bottom = box
+            rows.append((5, 1, block_num, par_num, line_num, word_num,
+                         left, top, right - left, bottom - top, conf, text))
+        return rows
+    
+    def _iter_api_words(self) -> Iterator[tuple]:
+        """Yield (at_block, at_para, at_line, box, conf, text) per word from either in-process API."""
+        if isinstance(self._api, _CTessAPI):
+            yield from self._api.iter_words()
+            return
+        self._api.Recognize()
+        iterator = self._api.GetIterator()
+        if iterator is None:
+            return
+        for word in tesserocr.iterate_level(iterator, RIL.WORD):
+            yield (word.IsAtBeginningOf(RIL.BLOCK), word.IsAtBeginningOf(RIL.PARA),
+                   word.IsAtBeginningOf(RIL.TEXTLINE), word.BoundingBox(RIL.WORD),
+                   word.Confidence(RIL.WORD), word.GetUTF8Text(RIL.WORD) or '')
+    
+    def _set_api_image(self, image: Union[Image.Image, np.ndarray]) -> None:
+        # tesserocr takes PIL images; the ctypes binding reads the numpy buffer directly
+        if not isinstance(self._api, _CTessAPI) and not isinstance(image, Image.Image):
+            image = Image.fromarray(image)
+        self._api.SetImage(image)
+    
+    def process_images(self, image_paths: List[str]) -> List[Optional[str]]:
+        """
+        Perform basic OCR on many images, one Tesseract run per chunk of images.
+        
+        Tesseract treats a .txt input as a list of image paths, so the engine and
+        traineddata are loaded once per chunk instead of once per image. Every
+        image is expected to be single-page (a multi-page TIFF would shift the
+        page -> image mapping).
+        
+        Args:
+            image_paths (List[str]): Paths to the image files.
+        
+        Returns:
+            List[Optional[str]]: Extracted text per input path (None for every path of a failed chunk).
+        """
+        if self._api is not None or self.preprocess:
+            # In-process API: no engine start-up to amortize, just reuse the loaded model.
+            # Preprocessing needs the decoded image, which an image-list file cannot carry.
+            return [self.process_image(image_path) for image_path in image_paths]
+        
+        results: List[Optional[str]] = []
+        for chunk in self._chunks(image_paths):
+            try:
+                logger.info("Running OCR with PyTesseract on %d images...", len(chunk))
+                with self._image_list(chunk) as list_file:
+                    text = pytesseract.image_to_string(list_file, lang=self.lang, config=self.config)
+                # Tesseract ends every page with a form feed
+                pages = text.split("\f")[:len(chunk)]
+                pages += [""] * (len(chunk) - len(pages))
+                results.extend(page.strip() for page in pages)
+            except pytesseract.pytesseract.TesseractNotFoundError:
+                logger.error("Tesseract not found. Ensure it's installed and in PATH.")
+                results.extend([None] * len(chunk))
+            except Exception as e:
+                logger.error("Error during batch OCR: %s", e)
+                results.extend([None] * len(chunk))
+        return results
+    
+    def process_images_with_confidence(
+        self,
+        image_paths: List[str],
+        min_confidence: float = 0.0,
+        as_words: bool = False
+    ) -> List[Optional[Dict[str, any]]]:
+        """
+        Batched process_image_with_confidence: one Tesseract image_to_data run per chunk of images.
+        
+        Rows of the combined output are mapped back to their image through the
+        page_num column (page N of the list = N-th image of the chunk).
+        
+        Args:
+            image_paths (List[str]): Paths to the image files (single-page images).
+            min_confidence (float): Minimum confidence threshold (0-100) to filter results.
+            as_words (bool): Return the records as Word namedtuples instead of dicts (default: False).
+        
+        Returns:
+            List[Optional[Dict[str, any]]]: One process_image_with_confidence-style result per path.
+        """
+        if self._api is not None or self.preprocess:
+            return [self.process_image_with_confidence(image_path, min_confidence, as_words=as_words)
+                    for image_path in image_paths]
+        
+        results: List[Optional[Dict[str, any]]] = []
+        for chunk in self._chunks(image_paths):
+            try:
+                logger.info("Running OCR with PyTesseract (detailed mode) on %d images...", len(chunk))
+                with self._image_list(chunk) as list_file:
+                    rows = self._image_to_data_rows(list_file)
+                
+                # Split the combined rows per page (= per image), keeping row order
+                rows_by_page: Dict[int, List[List[str]]] = {page: [] for page in range(1, len(chunk) + 1)}
+                for row in rows:
+                    page_rows = rows_by_page.get(int(row[1])) if len(row) > 1 else None
+                    if page_rows is not None:
+                        row[1] = '1'  # each image is page 1 of itself, as in the single-image path
+                        page_rows.append(row)
+                for page in range(1, len(chunk) + 1):
+                    results.append(self._parse_data(rows_by_page[page], min_confidence, as_words=as_words))
+            except pytesseract.pytesseract.TesseractNotFoundError:
+                logger.error("Tesseract not found. Ensure it's installed and in PATH.")
+                results.extend([None] * len(chunk))
+            except Exception as e:
+                logger.error("Error during batch OCR: %s", e)
+                results.extend([None] * len(chunk))
+        return results
+    
+    def process_batch(
+        self,
+        image_paths: List[str],
+        min_confidence: float = 0.0,
+        workers: Optional[int] = None,
+        as_words: bool = False
+    ) -> List[Optional[Dict[str, any]]]:
+        """
+        Run process_image_with_confidence over many images in parallel worker processes.
+        
+        Each worker runs single-threaded Tesseract (OMP_THREAD_LIMIT=1), so throughput
+        scales close to linearly with cores. Processes rather than threads are used so
+        result parsing does not serialize on the GIL between subprocess launches.
+        The pool is kept alive across calls and each worker builds its PyTesseractOCR once,
+        so repeated batches skip the per-call process start-up; with an in-process engine
+        (tesserocr or libtesseract) the model is also loaded and warmed up once per worker.
+        
+        Args:
+            image_paths (List[str]): Paths to the image files.
+            min_confidence (float): Minimum confidence threshold (0-100) to filter results.
+            workers (Optional[int]): Number of worker processes (default: os.cpu_count()).
+            as_words (bool): Return the records as Word namedtuples instead of dicts (default: False).
+        
+        Returns:
+            List[Optional[Dict[str, any]]]: Results in the same order as image_paths.
+        """
+        if not image_paths:
+            return []
+        pool = _get_pool(self.lang, self.config, self.preprocess, workers or os.cpu_count())
+        worker = partial(_worker_process, min_confidence=min_confidence, as_words=as_words)
+        return list(pool.imap(worker, image_paths))
+    
+    @classmethod
+    def _chunks(cls, image_paths: List[str]) -> Iterator[List[str]]:
+        for start in range(0, len(image_paths), cls._BATCH_CHUNK_SIZE):
+            yield list(image_paths[start:start + cls._BATCH_CHUNK_SIZE])
+    
+    @staticmethod
+    @contextmanager
+    def _image_list(image_paths: List[str]) -> Iterator[str]:
+        """Write the paths (one per line) to a temporary .txt file Tesseract reads as an image list."""
+        tmp = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', encoding='utf-8', delete=False)
+        try:
+            with tmp:
+                tmp.write("\n".join(str(Path(path).resolve()) for path in image_paths) + "\n")
+            yield tmp.name
+        finally:
+            os.unlink(tmp.name)
+    
+    @classmethod
+    def _parse_data(
+        cls,
+        rows: List[Sequence],
+        min_confidence: float,
+        include_data: bool = True,
+        as_words: bool = False
+    ) -> Dict[str, any]:
+        """
+        Filter image_to_data rows (_DATA_COLUMNS order) into {'data': [...], 'average_confidence': float}.
+        
+        Records are dicts, or Word namedtuples with as_words=True. With include_data=False
+        no per-word records are built and 'data' is left empty.
+        """
+        rows = [row for row in rows if len(row) >= 12]  # Structural rows can come without a text cell
+        if len(rows) < cls._VECTORIZE_MIN_ROWS:
+            return cls._parse_data_small(rows, min_confidence, include_data, as_words)
+        
+        keep = np.empty(0, dtype=np.intp)
+        if rows:
+            # Filter every row in one vectorized pass, then build records only for the survivors
+            columns = list(zip(*rows))
+            conf = np.asarray(columns[10], dtype=np.float64)
+            texts = [text.strip() for text in columns[11]]
+            has_text = np.fromiter((bool(text) for text in texts), dtype=bool, count=len(texts))
+            keep = np.flatnonzero(has_text & (conf >= min_confidence))
+        
+        if not keep.size:
+            logger.warning("No text detected with confidence above threshold.")
+            return {'data': [], 'average_confidence': 0.0}
+        
+        avg_conf = float(conf[keep].mean())
+        if not include_data:
+            return {'data': [], 'average_confidence': avg_conf}
+        
+        # Survivor count is known from the mask: size the list once and fill by index
+        make_record = Word if as_words else _word_dict
+        parsed_data: List[Union[Dict[str, any], Word]] = [None] * keep.size
+        for out, i in enumerate(keep.tolist()):
+            parsed_data[out] = make_record(*map(int, rows[i][:10]), float(conf[i]), texts[i])
+        
+        return {'data': parsed_data, 'average_confidence': avg_conf}
+    
+    @staticmethod
+    def _parse_data_small(
+        rows: List[Sequence],
+        min_confidence: float,
+        include_data: bool = True,
+        as_words: bool = False
+    ) -> Dict[str, any]:
+        """Small-N path of _parse_data: a single loop with a running confidence sum."""
+        make_record = Word if as_words else _word_dict
+        # Upper bound is one record per row: size once, fill by index, trim at the end
+        parsed_data: List[Union[Dict[str, any], Word]] = [None] * len(rows) if include_data else []
+        conf_sum = 0.0
+        conf_n = 0
+        for row in rows:
+            text = row[11].strip()
+            if not text:
+                continue
+            conf = float(row[10])
+            if conf >= min_confidence:
+                if include_data:
+                    parsed_data[conf_n] = make_record(*map(int, row[:10]), conf, text)
+                conf_sum += conf
+                conf_n += 1
+        
+        if not conf_n:
+            logger.warning("No text detected with confidence above threshold.")
+            return {'data': [], 'average_confidence': 0.0}
+        
+        del parsed_data[conf_n:]
+        return {'data': parsed_data, 'average_confidence': conf_sum / conf_n}
+    
+    @staticmethod
+    def _parse_columns(rows: List[Sequence], min_confidence: float) -> Dict[str, any]:
+        """Filter image_to_data rows into {column: ndarray, ..., 'average_confidence': float}."""
+        rows = [row for row in rows if len(row) >= 12]  # Structural rows can come without a text cell
+        ints = np.asarray([row[:10] for row in rows], dtype=np.int32).reshape(-1, 10)
+        conf = np.asarray([row[10] for row in rows], dtype=np.float32)
+        text = np.asarray([row[11].strip() for row in rows], dtype=object)
+        has_text = np.fromiter((bool(value) for value in text), dtype=bool, count=text.size)
+        keep = has_text & (conf >= min_confidence)
+        
+        # Filter once on the row matrix, then transpose-copy so every int column is contiguous
+        columns: Dict[str, any] = dict(zip(_DATA_COLUMNS[:10], ints[keep].T.copy()))
+        columns['conf'] = conf[keep]
+        columns['text'] = text[keep]
+        if not columns['conf'].size:
+            logger.warning("No text detected with confidence above threshold.")
+            columns['average_confidence'] = 0.0
+        else:
+            columns['average_confidence'] = float(columns['conf'].mean(dtype=np.float64))
+        return columns
+    
     def get_average_confidence(
         self, 
         image_path: str, 
@@ -140,7 +844,7 @@ class PyTesseractOCR:
         Compute and return only the average confidence score for the image.
         
         This is a convenience method that runs OCR and calculates the average
-        without returning the full detailed data.
+        without building the per-word detailed data.
         
         Args:
             image_path (str): Path to the image file.
@@ -149,41 +853,104 @@ class PyTesseractOCR:
         Returns:
             float: Average confidence score (0-100), or 0.0 if no data or on error.
         """
-        result = self.process_image_with_confidence(image_path, min_confidence)
+        result = self.process_image_with_confidence(image_path, min_confidence, include_data=False)
         if result is not None:
             return result['average_confidence']
         return 0.0
 
+
+# Persistent worker pool behind process_batch: created on first use, reused while the
+# OCR settings stay the same, and torn down at interpreter exit.
+_POOL = None
+_POOL_KEY: Optional[tuple] = None
+_POOL_LOCK = threading.Lock()
+# Per-worker-process engine, built once by _init_worker
+_WORKER_OCR: Optional[PyTesseractOCR] = None
+
+
+def _init_worker(lang: str, config: str, preprocess: bool) -> None:
+    # Never raise from here: Pool respawns a worker whose initializer fails, forever, and
+    # imap would hang; a worker left without an engine reports None per image instead
+    global _WORKER_OCR
+    try:
+        _WORKER_OCR = PyTesseractOCR(lang=lang, config=config, preprocess=preprocess)
+        if _WORKER_OCR._api is not None:
+            # Warm-up on a 1x1 white image so model loading is not billed to the first real page;
+            # pointless on the pytesseract fallback, where every call is a fresh subprocess anyway
+            _WORKER_OCR.process_image_with_confidence(
+                "<warmup>", image=np.full((1, 1), 255, dtype=np.uint8), use_cache=False
+            )
+    except Exception as e:
+        logger.error("OCR worker initialization failed: %s", e)
+        _WORKER_OCR = None
+
+
+def _worker_process(image_path: str, min_confidence: float, as_words: bool = False) -> Optional[Dict[str, any]]:
+    if _WORKER_OCR is None:
+        logger.error("No OCR engine in this worker (initialization failed), skipping: %s", image_path)
+        return None
+    return _WORKER_OCR.process_image_with_confidence(image_path, min_confidence=min_confidence, as_words=as_words)
+
+
+def _get_pool(lang: str, config: str, preprocess: bool, processes: int):
+    global _POOL, _POOL_KEY
+    key = (lang, config, preprocess, processes)
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_KEY != key:
+            _close_pool()
+            logger.info("Starting OCR worker pool: %d processes (lang=%r, config=%r)", processes, lang, config)
+            _POOL = Pool(processes=processes, initializer=_init_worker, initargs=(lang, config, preprocess))
+            _POOL_KEY = key
+        return _POOL
+
+
+def _close_pool() -> None:
+    # close() rather than terminate(): workers then exit cleanly and flush their queued log records
+    global _POOL, _POOL_KEY
+    if _POOL is not None:
+        _POOL.close()
+        _POOL.join()
+        _POOL = None
+        _POOL_KEY = None
+
+
+atexit.register(_close_pool)
+
+
 if __name__ == "__main__":
     if len(sys.argv) != 2:
         logger.error("Usage: python PyTesseract.py <image_path>")
         sys.exit(1)
     
     image_path = sys.argv[1]
-    logger.info(f"Processing: {image_path}\n{'-' * 60}")
+    logger.info("Processing: %s\n%s", image_path, '-' * 60)
     
     # Instantiate the class
-    ocr_processor = PyTesseractOCR(lang='eng', config='--psm 3')
+    ocr_processor = PyTesseractOCR(lang='eng', psm=3)
     
     # Get detailed results with confidence (e.g., filter below 60 confidence)
     result = ocr_processor.process_image_with_confidence(image_path, min_confidence=60.0)
     
     if result is not None:
         avg_conf = result['average_confidence']
-        logger.info(f"Average Confidence: {avg_conf:.2f}")
+        logger.info("Average Confidence: %.2f", avg_conf)
         
         # Build full text from detailed data
         full_text = " ".join(item['text'] for item in result['data'])
         
         # Log detailed results (optional; comment out if you only want average)
-        logger.info("Detailed Results (filtered):")
-        for item in result['data']:
-            logger.info(f"Text: '{item['text']}' | Conf: {item['conf']:.2f} | Box: ({item['left']}, {item['top']}, {item['width']}, {item['height']})")
+        # Skip the per-word loop entirely when INFO is filtered out
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Detailed Results (filtered):")
+            log_info = logger.info
+            for item in result['data']:
+                log_info(_FMT, item['text'], item['conf'], item['left'], item['top'], item['width'], item['height'])
         
-        logger.info(f"Full Extracted Text:\n{'-' * 60}\n{full_text.strip()}\n{'-' * 60}")
+        # Words are already stripped in _parse_data, so full_text needs no further strip
+        logger.info("Full Extracted Text:\n%s\n%s\n%s", '-' * 60, full_text, '-' * 60)
         
         # Print to stdout: Average confidence and full text (easy for scripting)
-        print(f"Average Confidence: {avg_conf:.2f}")
+        sys.stdout.write(f"Average Confidence: {avg_conf:.2f}\n")
     else:
         logger.error("OCR failed. Check logs for details.")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Smoke test for the ctypes libtesseract binding (_CTessAPI) in ocrs/models/PyTesseract.py.
+
+Run with src/ on PYTHONPATH (see tox.ini [testenv:pytess]):
+    python -m pytest src/tests/ocrs
+Skips when cv2/pytesseract, the tesseract CLI or the libtesseract shared library is missing.
+"""
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+pytesseract = pytest.importorskip("pytesseract")
+
+from ocrs.models import PyTesseract as tess_module  # noqa: E402
+
+ASSET = Path(__file__).parent / "assets" / "ocr_math.png"
+# Same settings on both sides: --psm 3 with Tesseract's default engine (OEM_DEFAULT = 3)
+PSM, OEM = 3, 3
+
+_libtess = tess_module._load_libtesseract()
+
+
+@pytest.fixture
+def ctess(monkeypatch):
+    if _libtess is None:
+        pytest.skip("libtesseract shared library not available")
+    # _CTessAPI binds whatever the module loaded; with tesserocr installed that is None
+    monkeypatch.setattr(tess_module, "_libtess", _libtess)
+    api = tess_module._CTessAPI(lang="eng", psm=PSM, oem=OEM)
+    yield api
+    api.End()
+
+
+@pytest.fixture
+def gray():
+    image = cv2.imread(str(ASSET), cv2.IMREAD_GRAYSCALE)
+    assert image is not None, f"could not read {ASSET}"
+    return image
+
+
+def _cli_words(image):
+    try:
+        data = pytesseract.image_to_data(
+            image, lang="eng", config=f"--psm {PSM} --oem {OEM}", output_type=pytesseract.Output.DICT
+        )
+    except pytesseract.TesseractNotFoundError:
+        pytest.skip("tesseract CLI not available")
+    return [
+        (data["text"][i].strip(), (data["left"][i], data["top"][i], data["width"][i], data["height"][i]))
+        for i in range(len(data["text"]))
+        if data["level"][i] == 5 and data["text"][i].strip()
+    ]
+
+
+def test_ctess_words_match_image_to_data(ctess, gray):
+    ctess.SetImage(gray)
+    words = [
+        (text.strip(), (box[0], box[1], box[2] - box[0], box[3] - box[1]))
+        for _, _, _, box, _, text in ctess.iter_words()
+        if box is not None and text.strip()
+    ]
+
+    expected = _cli_words(gray)
+    assert words, "no words recognized through the ctypes binding"
+    assert [text for text, _ in words] == [text for text, _ in expected]
+    assert [box for _, box in words] == [box for _, box in expected]
+
+
+def test_ctess_confidences_and_text(ctess, gray):
+    ctess.SetImage(gray)
+    confidences = [conf for *_, conf, text in ctess.iter_words() if text.strip()]
+    assert confidences and all(0.0 <= conf <= 100.0 for conf in confidences)
+
+    # Same image, now through GetUTF8Text: exercises the TessDeleteText ownership path
+    text = ctess.GetUTF8Text()
+    assert "marked" in text
+
+    # End() is idempotent (also called again by the fixture and __del__)
+    ctess.End()
+    ctess.End()
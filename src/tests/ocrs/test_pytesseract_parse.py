@@ -0,0 +1,158 @@
+"""
+Unit tests for PyTesseractOCR's row parsing and config handling, on synthetic image_to_data rows.
+
+No tesseract binary or libtesseract is needed: the in-process engines are disabled and
+OCR output is fed in directly. Run with src/ on PYTHONPATH (see tox.ini [testenv:pytess]):
+    python -m pytest src/tests/ocrs
+"""
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("pytesseract")
+
+from ocrs.models import PyTesseract as tess_module  # noqa: E402
+from ocrs.models.PyTesseract import PyTesseractOCR, Word  # noqa: E402
+
+CONFS = ['-1', '35.5', '96.123456', '60', '0']
+TEXTS = ['', ' ', 'alpha', 'beta ', ' gamma']
+
+
+def _row(i, page=1, conf=None, text=None):
+    """One image_to_data TSV row (all cells are strings, as csv.reader yields them)."""
+    return [
+        '5', str(page), str(i // 20 + 1), '1', str(i // 5 + 1), str(i % 5 + 1),
+        str(10 * i), str(3 * i), str(40 + i), str(12 + i % 7),
+        CONFS[i % len(CONFS)] if conf is None else conf,
+        TEXTS[i % len(TEXTS)] if text is None else text,
+    ]
+
+
+def _rows(n):
+    rows = [_row(i) for i in range(n)]
+    # Structural (page/block/line) rows can come without a text cell and must be skipped
+    rows.insert(0, ['1', '1', '0', '0', '0', '0', '0', '0', '800', '600', '-1'])
+    return rows
+
+
+def _make_ocr(monkeypatch, **kwargs):
+    # Force the pytesseract path: no tesserocr / ctypes engine is created
+    monkeypatch.setattr(tess_module, "tesserocr", None)
+    monkeypatch.setattr(tess_module, "_libtess", None)
+    return PyTesseractOCR(**kwargs)
+
+
+def _parse(monkeypatch, rows, min_confidence, vectorized, **kwargs):
+    monkeypatch.setattr(PyTesseractOCR, "_VECTORIZE_MIN_ROWS", 0 if vectorized else 10 ** 9)
+    return PyTesseractOCR._parse_data([list(row) for row in rows], min_confidence, **kwargs)
+
+
+@pytest.mark.parametrize("n", [1, 7, 63, 64, 250])
+@pytest.mark.parametrize("min_confidence", [0.0, 50.0])
+def test_small_and_vectorized_paths_agree(monkeypatch, n, min_confidence):
+    rows = _rows(n)
+    small = _parse(monkeypatch, rows, min_confidence, vectorized=False)
+    vectorized = _parse(monkeypatch, rows, min_confidence, vectorized=True)
+
+    assert small['data'] == vectorized['data']
+    assert small['average_confidence'] == pytest.approx(vectorized['average_confidence'])
+
+    # -1 (no confidence) rows never pass and blank texts are dropped; kept texts are stripped
+    for record in small['data']:
+        assert record['conf'] >= min_confidence and record['conf'] != -1
+        assert record['text'] and record['text'] == record['text'].strip()
+    kept = [float(row[10]) for row in rows[1:] if row[11].strip() and float(row[10]) >= min_confidence]
+    assert len(small['data']) == len(kept)
+    assert small['average_confidence'] == pytest.approx(sum(kept) / len(kept) if kept else 0.0)
+
+
+def test_records_keep_column_order_and_types(monkeypatch):
+    record = _parse(monkeypatch, [_row(2)], 0.0, vectorized=False)['data'][0]
+    assert list(record) == list(tess_module._DATA_COLUMNS)
+    assert all(isinstance(record[column], int) for column in tess_module._DATA_COLUMNS[:10])
+    assert record['conf'] == pytest.approx(96.123456)
+    assert record['text'] == 'alpha'
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_include_data_false_only_averages(monkeypatch, vectorized):
+    rows = _rows(120)
+    full = _parse(monkeypatch, rows, 10.0, vectorized)
+    summary = _parse(monkeypatch, rows, 10.0, vectorized, include_data=False)
+    assert summary['data'] == []
+    assert summary['average_confidence'] == pytest.approx(full['average_confidence'])
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_as_words_matches_dict_records(monkeypatch, vectorized):
+    rows = _rows(120)
+    dicts = _parse(monkeypatch, rows, 0.0, vectorized)
+    words = _parse(monkeypatch, rows, 0.0, vectorized, as_words=True)
+    assert all(isinstance(word, Word) for word in words['data'])
+    assert [word._asdict() for word in words['data']] == dicts['data']
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_nothing_above_threshold(monkeypatch, vectorized):
+    result = _parse(monkeypatch, _rows(80), 101.0, vectorized)
+    assert result == {'data': [], 'average_confidence': 0.0}
+
+
+def test_columns_match_records(monkeypatch):
+    rows = _rows(90)
+    records = _parse(monkeypatch, rows, 30.0, vectorized=True)
+    columns = PyTesseractOCR._parse_columns([list(row) for row in rows], 30.0)
+    assert columns['text'].tolist() == [record['text'] for record in records['data']]
+    assert columns['left'].tolist() == [record['left'] for record in records['data']]
+    assert columns['conf'].tolist() == pytest.approx([record['conf'] for record in records['data']], rel=1e-6)
+    assert columns['average_confidence'] == pytest.approx(records['average_confidence'], rel=1e-6)
+
+
+def test_batched_rows_are_split_per_image_with_page_num_1(monkeypatch):
+    ocr = _make_ocr(monkeypatch, lang='eng')
+    rows = [
+        _row(2, page=1, text='first'),
+        _row(3, page=2, conf='80', text='second'),
+        _row(4, page=2, conf='70', text='third'),
+        ['1', '3', '0', '0', '0', '0', '0', '0', '800', '600', '-1'],  # page 3: structural row only
+    ]
+    monkeypatch.setattr(ocr, "_image_to_data_rows", lambda list_file: [list(row) for row in rows])
+
+    results = ocr.process_images_with_confidence(['a.png', 'b.png', 'c.png'])
+    assert [[record['text'] for record in result['data']] for result in results] == [
+        ['first'], ['second', 'third'], []
+    ]
+    assert results[1]['average_confidence'] == pytest.approx(75.0)
+    assert all(record['page_num'] == 1 for result in results for record in result['data'])
+
+
+def test_unscale_boxes_maps_back_to_input_coordinates():
+    tsv_row = ['5', '1', '1', '1', '1', '1', '20', '41', '100', '30', '90.5', 'word']
+    api_row = (5, 1, 1, 1, 1, 2, 8, 6, 33, 11, 88.0, 'next')
+    short_row = ['1', '1']
+
+    tsv_out, api_out, short_out = PyTesseractOCR._unscale_boxes([tsv_row, api_row, short_row], 2.0)
+    assert tsv_out[6:10] == [10, 20, 50, 15]  # round(41 / 2) -> 20 (banker's rounding)
+    assert list(api_out[6:10]) == [4, 3, 16, 6]
+    # Everything but the box columns is untouched
+    assert tsv_out[:6] == tsv_row[:6] and tsv_out[10:] == tsv_row[10:]
+    assert list(api_out[10:]) == [88.0, 'next']
+    assert short_out == short_row
+
+
+@pytest.mark.parametrize("kwargs, config, psm, oem", [
+    ({}, "--psm 3 --oem 1 -c tessedit_do_invert=0", 3, 1),
+    ({'psm': 6, 'oem': 0}, "--psm 6 --oem 0 -c tessedit_do_invert=0", 6, 0),
+    # Explicit config without --oem: Tesseract's default engine, string untouched
+    ({'config': '--psm 3'}, "--psm 3", 3, 3),
+    # The config's own flags win over the arguments
+    ({'config': '--psm 11 --oem 0', 'psm': 6, 'oem': 1}, "--psm 11 --oem 0", 11, 0),
+    # Explicit arguments the config lacks are appended, so the CLI runs them too
+    ({'config': '--psm 3', 'oem': 1}, "--psm 3 --oem 1", 3, 1),
+    ({'config': '-c preserve_interword_spaces=1', 'psm': 6}, "-c preserve_interword_spaces=1 --psm 6", 6, 3),
+    # psm 3 is the CLI default, so it is not appended
+    ({'config': '-c preserve_interword_spaces=1'}, "-c preserve_interword_spaces=1", 3, 3),
+])
+def test_config_merges_psm_and_oem(monkeypatch, kwargs, config, psm, oem):
+    ocr = _make_ocr(monkeypatch, **kwargs)
+    assert (ocr.config, ocr.psm, ocr.oem) == (config, psm, oem)
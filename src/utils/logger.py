@@ -1,20 +1,134 @@
 # utils/logger.py
+import atexit
+import functools
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+from multiprocessing import util as mp_util
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 import sys
 
+
+class _RouterHandler(logging.Handler):
+    """Runs on the listener thread: passes each record to the handlers of the logger it was queued by."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.routes: dict[str, list[logging.Handler]] = {}
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        for handler in self.routes.get(getattr(record, "log_route", record.name), ()):
+            if record.levelno >= handler.level:  # respect each handler's own level
+                handler.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
+class _RoutedQueueHandler(QueueHandler):
+    """QueueHandler that tags records with the owning logger's name (child loggers propagate up)."""
+
+    def __init__(self, route: str) -> None:
+        super().__init__(None)
+        self.route = route
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.log_route = self.route
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Look the queue up at call time: a forked child gets a fresh queue + listener
+        _log_queue.put_nowait(record)
+
+
+# Logging calls only enqueue; file and console writes happen on the listener thread
+_router = _RouterHandler()
+_log_queue: queue.Queue = queue.Queue(-1)
+_listener = QueueListener(_log_queue, _router)
+_listener.start()
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:  # may run twice in a multiprocessing child (Finalize + atexit)
+        _listener.stop()  # flushes everything still queued
+        _listener = None
+
+
+def _restart_listener_in_child() -> None:
+    # Threads do not survive fork(); give the child its own queue and listener thread
+    global _log_queue, _listener
+    _log_queue = queue.Queue(-1)
+    _listener = QueueListener(_log_queue, _router)
+    _listener.start()
+
+
+def _finalize_listener_in_mp_child(_: object) -> None:
+    # multiprocessing workers (e.g. Pool) leave through os._exit, so atexit never flushes their
+    # listener; their exit path does run multiprocessing finalizers (registered after fork here,
+    # as the child's bootstrap clears the inherited ones)
+    mp_util.Finalize(None, _stop_listener, exitpriority=0)
+
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+mp_util.register_after_fork(_router, _finalize_listener_in_mp_child)
+
+
+_FORMATTER = logging.Formatter(
+    "%(asctime)s | %(name)s | %(levelname)s | %(message)s [from %(filename)s:%(lineno)d]",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+# Log directories already created by this process
+_created_dirs: set[str] = set()
+
+
+def _ensure_dir(log_dir: str) -> Path:
+    path = Path(log_dir)
+    if log_dir not in _created_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(log_dir)
+    return path
+
+
+def _console_default() -> bool:
+    value = os.environ.get("LOG_CONSOLE", "").strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    return sys.stdout.isatty()
+
+
 def get_logger(
     name: str | None = None,
     log_level: str = "INFO",
     log_dir: str | Path = "logs",
-    console: bool = True,
+    console: bool | None = None,
 ) -> logging.Logger:
     """
     Returns a logger that writes to logs/<module_name>.log
     Call once at the top of every module:
         logger = get_logger(__name__)
+    The logger itself only holds a QueueHandler; the file/console handlers run on a
+    background QueueListener thread so logging never blocks on disk or stdout.
+    Results are memoized per argument set, so repeated calls are a dict lookup.
+    console=None (default) follows the LOG_CONSOLE env var ("1"/"0"), and when that is
+    unset only attaches the console handler if stdout is a TTY; pass console=True to
+    force it. The Docker image sets LOG_CONSOLE=1 so `docker logs` keeps the output.
     """
+    if console is None:
+        console = _console_default()
+    return _get_logger(name, log_level, str(log_dir), console)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_logger(name: str | None, log_level: str, log_dir: str, console: bool) -> logging.Logger:
     logger_name = name or __name__
     if logger_name == "__main__":
         logger_name = "main"
@@ -27,35 +141,31 @@ def get_logger(
 
     logger.setLevel(log_level.upper())
 
-    # Ensure log directory exists
-    log_dir = Path(log_dir)
-    log_dir.mkdir(parents=True, exist_ok=True)
-
+    # Ensure log directory exists (once per directory per process)
     # File goes to logs/your.module.name.log
-    log_file = log_dir / f"{logger_name.replace('.', '_')}.log"
-
-    formatter = logging.Formatter(
-        "%(asctime)s | %(name)s | %(levelname)s | %(message)s [from %(filename)s:%(lineno)d]",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
+    log_file = _ensure_dir(log_dir) / f"{logger_name.replace('.', '_')}.log"
 
-    # File handler — one file per module
+    # File handler — one file per module, opened on first emit
     file_handler = RotatingFileHandler(
         log_file,
-        maxBytes=10 * 1024 * 1024,   # 10 MB
-        backupCount=10,
-        encoding="utf-8"
+        maxBytes=64 * 1024 * 1024,   # 64 MB
+        backupCount=3,
+        encoding="utf-8",
+        delay=True
     )
     file_handler.setLevel(log_level.upper())
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    file_handler.setFormatter(_FORMATTER)
+    handlers: list[logging.Handler] = [file_handler]
 
     # Optional console output
     if console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(log_level.upper())
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        console_handler.setFormatter(_FORMATTER)
+        handlers.append(console_handler)
+
+    _router.routes[logger_name] = handlers
+    logger.addHandler(_RoutedQueueHandler(logger_name))
 
     logger.propagate = False
     return logger
@@ -69,7 +179,7 @@ if __name__ == "__main__":
     parser.add_argument("--no-console", action="store_true")
     args = parser.parse_args()
 
-    logger = get_logger("test_direct_run", log_level=args.log_level, console=not args.no_console)
+    logger = get_logger("test_direct_run", log_level=args.log_level, console=False if args.no_console else None)
     logger.debug("Debug from direct run")
     logger.info("Info from direct run")
     logger.warning("This goes to logs/test_direct_run.log")
\ No newline at end of file